@@ -3,13 +3,18 @@
 from boututils.run_wrapper import shell, shell_safe
 import argparse
 import datetime
-import glob
+import io
 import numpy as np
 import os
 import pandas as pd
 import pathlib
+import re
 import shutil
-import timeit
+import subprocess
+import tempfile
+import time
+import urllib.parse
+import urllib.request
 
 
 # Exit code to use to indicate to git bisect to skip this commit
@@ -21,25 +26,56 @@ DEFAULT_MODEL_PATH = "./work_models/elm_pb"
 # Default model executable
 DEFAULT_MODEL_EXE = "elm_pb"
 
+# Files which, if changed between bisect steps, need a full clean
+# rather than an incremental rebuild
+BUILD_SYSTEM_FILES = re.compile(
+    r"^(configure(\.ac)?|make\.config\.in|.*[Mm]akefile.*|m4/.*"
+    r"|externalpackages/.*|\.gitmodules)$"
+)
 
-class DataFrameWithName(pd.DataFrame):
-    """Pandas DataFrame but with a "name" attribute that will persist
+# Separator between column names in the header of the timings table:
+# names may contain single spaces, so split on pipes or runs of spaces
+TIMINGS_HEADER_SEPARATOR = re.compile(r"\s*\|\s*|\s{2,}")
+
+
+def _build_system_changed():
+    """Return True if the build system or submodules have changed since
+    the previous checkout, or if we can't tell
 
     """
+    status, changed = shell("git diff --name-only HEAD@{1} HEAD", pipe=True)
+    if status != 0:
+        return True
+    return any(BUILD_SYSTEM_FILES.match(filename) for filename in changed.splitlines())
 
-    _metadata = ["name"]
 
-    @property
-    def _constructor(self):
-        return DataFrameWithName
+def _submodules_out_of_sync():
+    """Return True if any submodules are uninitialised, checked out at
+    the wrong commit or conflicted, or if we can't tell
+
+    """
+    status, submodules = shell("git submodule status --recursive", pipe=True)
+    if status != 0:
+        return True
+    return any(line[:1] in ("-", "+", "U") for line in submodules.splitlines())
 
 
-def cleanup():
+def cleanup(incremental=False):
     """Make sure BOUT++ directory is clean and submodules correct
 
+    If `incremental` is True, skip cleaning unless the build system or
+    submodules have changed since the previous checkout. Submodules
+    are only reinitialised if they are out of sync
+
     """
-    shell("make distclean")
-    shell_safe(r'find src -type f -name "*\.o" -delete')
+    if incremental and not _build_system_changed():
+        print("Build system unchanged, skipping clean")
+    else:
+        shell("make distclean")
+        shell_safe(r'find src -type f -name "*\.o" -delete')
+
+    if not _submodules_out_of_sync():
+        return
 
     shutil.rmtree("googletest", ignore_errors=True)
     shutil.rmtree("externalpackages/googletest", ignore_errors=True)
@@ -47,33 +83,133 @@ def cleanup():
     shell_safe("git submodule update --init --recursive")
 
 
-def configure_bout(configure_line=None):
+def configure_bout(configure_line=None, optimise=True, use_ccache=True):
     """Configure BOUT++
 
+    If `optimise` is False, build with `-O0`, which is much quicker to
+    compile when only bisecting for correctness. If `use_ccache` is
+    True and ccache is available, wrap the compiler with it
+
     """
 
     if configure_line is None:
+        if optimise:
+            cxxflags = "-std=c++11 -fdiagnostics-color=always"
+            optimise_flag = "--enable-optimize=3"
+        else:
+            cxxflags = "-std=c++11 -fdiagnostics-color=always -O0"
+            optimise_flag = "--enable-optimize=no"
+
         configure_line = (
             "./configure -C "
-            "CXXFLAGS='-std=c++11 -fdiagnostics-color=always' "
-            "--with-netcdf --enable-optimize=3 --enable-checks=no "
+            "CXXFLAGS='{cxxflags}' "
+            "--with-netcdf {optimise_flag} --enable-checks=no "
             "--disable-backtrace"
-        )
+        ).format(cxxflags=cxxflags, optimise_flag=optimise_flag)
+
+        if use_ccache and shutil.which("ccache") is not None:
+            # Wrap the compiler configure would have used anyway. If we
+            # can't find it, leave configure to search for one itself
+            mpicxx = os.environ.get("MPICXX", "mpicxx")
+            if mpicxx.split() and shutil.which(mpicxx.split()[0]) is not None:
+                configure_line += " MPICXX='ccache {}'".format(mpicxx)
 
     print(configure_line)
     shell_safe(configure_line)
 
 
-def build_bout(configure_line=None):
+def setup_ccache():
+    """Point ccache at a dedicated cache large enough to hold the whole
+    library, so that consecutive bisect steps only need to recompile
+    the files that actually changed. Doesn't override anything the
+    user has already set
+
+    Returns True if ccache is available
+
+    """
+    if shutil.which("ccache") is None:
+        return False
+
+    os.environ.setdefault(
+        "CCACHE_DIR", os.path.join(os.path.expanduser("~"), ".ccache-bout")
+    )
+    os.environ.setdefault("CCACHE_MAXSIZE", "10G")
+    os.environ.setdefault("CCACHE_SLOPPINESS", "pch_defines,time_macros")
+    return True
+
+
+def build_bout(configure_line=None, use_ccache=True):
     """Build BOUT++
+
+    If `use_ccache` is True and ccache is available, print its
+    statistics afterwards
+
     """
     shell_safe("make -j8")
 
+    if use_ccache and shutil.which("ccache") is not None:
+        shell("ccache -s")
+
+
+def guess_archive_format(filename):
+    """Return the `shutil.unpack_archive` format for `filename` based on
+    its extension, or None if it isn't recognised
+
+    """
+    for name, extensions, _ in shutil.get_unpack_formats():
+        if any(filename.endswith(extension) for extension in extensions):
+            return name
+    return None
+
+
+def fetch_bout(url_template, commit, sha, archive_format=None):
+    """Download and unpack a pre-built BOUT++ into the current
+    directory, instead of configuring and building it
+
+    `url_template` may contain "{commit}" and "{sha}", which are
+    replaced with the short and full commit hashes respectively. If
+    `archive_format` is None, it's guessed from the URL. Raises
+    RuntimeError if the artifact can't be fetched or unpacked
 
-def runtest(nout, repeat=5, path=None, nprocs=4, model=None, log_dir=None):
+    """
+    url = url_template.format(commit=commit, sha=sha)
+    print("Fetching {}".format(url))
+
+    if archive_format is None:
+        archive_format = guess_archive_format(urllib.parse.urlparse(url).path)
+        if archive_format is None:
+            raise RuntimeError("Couldn't tell archive format of {}".format(url))
+
+    with tempfile.TemporaryDirectory() as download_directory:
+        archive = os.path.join(download_directory, "bout-artifact")
+        try:
+            urllib.request.urlretrieve(url, archive)
+            shutil.unpack_archive(archive, format=archive_format)
+        except (OSError, ValueError, shutil.ReadError) as error:
+            raise RuntimeError(
+                "Couldn't fetch BOUT++ from {}: {}".format(url, error)
+            ) from error
+
+
+def runtest(
+    nout,
+    repeat=5,
+    path=None,
+    nprocs=4,
+    model=None,
+    log_dir=None,
+    good=None,
+    bad=None,
+    metric="low",
+    min_repeat=3,
+):
     """Run `model` in `path` `repeat` times, returning the mean runtime
     and its standard deviation
 
+    If `good` and `bad` are given, stop early once at least
+    `min_repeat` runs have been done and the runtime `metric` ("low"
+    or "mean") is clearly either good or bad
+
     """
     if path is None:
         path = DEFAULT_MODEL_PATH
@@ -81,29 +217,86 @@ def runtest(nout, repeat=5, path=None, nprocs=4, model=None, log_dir=None):
         model = DEFAULT_MODEL_EXE
     os.chdir(path)
 
+    # Always (re)build the model: building the library doesn't build
+    # the model, which needs relinking against it. If nothing has
+    # changed, this is a no-op on a handful of files
     shell_safe("make")
 
-    command = "mpirun -n {nprocs} ./{model} NOUT={nout} >/dev/null".format(
-        model=model, nout=nout, nprocs=nprocs
-    )
+    # Run directly rather than through a shell, so that we're not
+    # also timing the shell startup. mpirun's own startup is still
+    # included: avoiding that would need a persistent runner inside
+    # the BOUT++ models themselves, and Open MPI settings such as
+    # plm_rsh_num_concurrent only affect multi-node launches, so the
+    # model runs in the user's environment unchanged
+    command = [
+        "mpirun",
+        "-n",
+        str(nprocs),
+        "./{model}".format(model=model),
+        "NOUT={nout}".format(nout=nout),
+    ]
+
+    def run_model():
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL)
+        except OSError as error:
+            # For example, mpirun missing: skip this commit, as we did
+            # when the shell reported the failure
+            raise RuntimeError(
+                "Couldn't run {}: {}".format(" ".join(command), error)
+            ) from error
+        if result.returncode != 0:
+            raise RuntimeError(
+                "Run failed with {}.\nCommand was:\n{}".format(
+                    result.returncode, " ".join(command)
+                )
+            )
 
     runtime = []
 
     for run_number in range(repeat):
-        runtime.append(timeit.timeit(lambda: shell_safe(command), number=1))
+        remove_output_files()
+        start = time.perf_counter()
+        run_model()
+        runtime.append(time.perf_counter() - start)
         backup_log_file(log_dir, subdir="run{:02d}".format(run_number))
 
-    return {"mean": np.mean(runtime), "std": np.std(runtime), "low": np.min(runtime)}
+        if good is not None and len(runtime) >= max(min_repeat, 2):
+            # Use the sample standard deviation here: the population
+            # one underestimates the spread badly for so few runs
+            mean, std = _mean_and_std(runtime, ddof=1)
+            current = min(runtime) if metric == "low" else mean
+            if metric_is_decided(good, bad, current, std):
+                print("Result is clear after {} runs, stopping".format(len(runtime)))
+                break
+
+    mean, std = _mean_and_std(runtime)
+    return {"mean": mean, "std": std, "low": min(runtime)}
+
+
+def _mean_and_std(values, ddof=0):
+    """Return the mean and standard deviation of a short list of
+    numbers. `ddof` is as for `numpy.std`
+
+    """
+    mean = sum(values) / len(values)
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - ddof)
+    return mean, variance**0.5
 
 
 def git_info():
-    """Return a dict of the commit hash and the date on which it was committed
+    """Return a dict of the short and full commit hashes, and the date
+    on which it was committed
 
     """
     _, git_commit = shell_safe("git rev-parse HEAD", pipe=True)
     _, commit_date = shell_safe("git --no-pager show -s --format=%ci", pipe=True)
 
-    return {"commit": git_commit[:7], "date": commit_date.strip()}
+    return {
+        "commit": git_commit[:7],
+        "sha": git_commit.strip(),
+        "date": commit_date.strip(),
+    }
 
 
 def metric_is_good(good, bad, metric, metric_std=0.0, factor=0.5):
@@ -135,6 +328,30 @@ def metric_is_good(good, bad, metric, metric_std=0.0, factor=0.5):
     return (metric < good_zone) and (metric_std < weighted_difference)
 
 
+def metric_is_decided(good, bad, metric, metric_std, factor=0.5, confidence=2.0):
+    """Return true if `metric` is far enough from the boundary between
+    good and bad that more samples are unlikely to change the result
+    of `metric_is_good`
+
+    Parameters
+    ----------
+    good, bad, metric, metric_std, factor
+        As for `metric_is_good`
+    confidence : float, optional
+        How many standard deviations `metric` needs to be from the
+        boundary between good and bad
+
+    """
+
+    weighted_difference = factor * (bad - good)
+    good_zone = good + weighted_difference
+    margin = confidence * metric_std
+
+    if metric > good_zone + margin:
+        return True
+    return (metric < good_zone - margin) and (metric_std < weighted_difference)
+
+
 def backup_log_file(directory=None, subdir=None, include_dump_files=True):
     """Backup log files according to the commit
 
@@ -153,41 +370,92 @@ def backup_log_file(directory=None, subdir=None, include_dump_files=True):
     except FileExistsError:
         pass
 
-    old_data_directory = "data"
-    log_files = os.path.join(old_data_directory, "BOUT.log.*")
-    logs = glob.glob(log_files)
-    for log in logs:
-        shutil.copy(src=log, dst=new_log_directory)
+    for output_file in _output_files(include_dump_files=include_dump_files):
+        backup_file = os.path.join(new_log_directory, os.path.basename(output_file))
+        if os.path.exists(backup_file):
+            os.remove(backup_file)
+        # Hard links are free, but fall back to copying if not possible
+        # (different filesystems, etc.)
+        try:
+            os.link(output_file, backup_file)
+        except OSError:
+            shutil.copy(src=output_file, dst=backup_file)
 
-    if not include_dump_files:
-        return
 
-    dmp_files = os.path.join(old_data_directory, "BOUT.dmp.*")
-    dmps = glob.glob(dmp_files)
-    for dmp in dmps:
-        shutil.copy(src=dmp, dst=new_log_directory)
+def _output_files(data_directory="data", include_dump_files=True):
+    """Return the paths of the log files, and optionally dump files, in
+    `data_directory`. Returns an empty list if `data_directory` doesn't
+    exist
+
+    """
+    prefixes = ("BOUT.log.", "BOUT.dmp.") if include_dump_files else ("BOUT.log.",)
+    try:
+        filenames = os.listdir(data_directory)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(data_directory, filename)
+        for filename in filenames
+        if filename.startswith(prefixes)
+    ]
+
+
+def remove_output_files(data_directory="data"):
+    """Remove the log and dump files from `data_directory`
+
+    BOUT++ overwrites these files in place, which would also clobber
+    any hard linked backups, so they need removing before each run
+
+    """
+    for output_file in _output_files(data_directory):
+        os.remove(output_file)
 
 
-def _get_start_end_of_timings(logfile):
-    """Return the line numbers of the start and end of the timings table,
-    as well as the total number of lines in the logfile
+def append_to_log(filename, line):
+    """Append `line` to `filename` as a single unbuffered write
 
     """
-    total = 0
-    with open(logfile, "r") as f:
-        for line_number, line in enumerate(f):
-            if line.startswith("Sim Time"):
-                start = line_number
-            if line.startswith("Run finished"):
-                end = line_number
-            total += 1
-    return (start, end, total)
+    with open(filename, "ab", buffering=0) as f:
+        f.write(line.encode())
+
+
+def _read_timings_block(path_to_logfile):
+    """Return the column names of the timings table in
+    `path_to_logfile`, and the rows of the table as whitespace
+    separated text
+
+    """
+    with open(path_to_logfile, "r") as f:
+        log = f.read()
+
+    # Find the start and end of the timings table with a couple of
+    # string searches, rather than checking every line
+    start = log.rfind("\nSim Time") + 1
+    end = log.rfind("\nRun finished")
+    if start == 0 or end == -1 or end < start:
+        raise ValueError("Couldn't find timings table in {}".format(path_to_logfile))
+
+    # Header plus the timesteps, skipping any blank lines
+    table_lines = [line for line in log[start:end].splitlines() if line.strip()]
+
+    # Only the header needs a regex; the rows themselves are just
+    # numbers separated by whitespace, which the fast parsers handle
+    header = TIMINGS_HEADER_SEPARATOR.split(table_lines[0].strip())
+    rows = "\n".join(table_lines[1:]).replace("|", " ")
+
+    return header, rows
 
 
 def read_timings_from_logfile(
-    nout=None, directory="data", logfile="BOUT.log.0", skip_first=True, name=None
+    nout=None,
+    directory="data",
+    logfile="BOUT.log.0",
+    skip_first=True,
+    name=None,
 ):
-    """Return a pandas dataframe of the timings table from logfile in directory
+    """Return a pandas dataframe of the timings table from logfile in
+    directory. The name of the simulation is stored in
+    `timing_table.attrs["name"]`
 
     Parameters
     ----------
@@ -213,23 +481,41 @@ def read_timings_from_logfile(
 
     """
 
-    path_to_logfile = os.path.join(directory, logfile)
+    header, rows = _read_timings_block(os.path.join(directory, logfile))
 
-    start, end, _ = _get_start_end_of_timings(path_to_logfile)
+    timing_table = pd.read_csv(
+        io.StringIO(rows),
+        sep=r"\s+",
+        engine="c",
+        header=None,
+        names=header,
+        dtype=np.float64,
+        index_col="Sim Time",
+    )
 
-    # Two extra rows: header plus blank line
-    if nout is None:
-        nout = end - start - 2
+    if nout is not None:
+        timing_table = timing_table.iloc[:nout]
 
-    timing_table = DataFrameWithName(
-        pd.read_csv(
-            path_to_logfile,
-            sep=r"(?:\s+\|\s+|\s{2,})",
-            skiprows=start,
-            nrows=nout,
-            engine="python",
-            index_col="Sim Time",
-        )
+    if skip_first:
+        timing_table = timing_table.drop([0])
+
+    # Convert the following %-times to seconds, all in one go
+    columns = ["Calc", "Inv", "Comm", "I/O", "SOLVER"]
+    absolute_times = (
+        timing_table["Wall Time"].to_numpy()[:, np.newaxis]
+        * timing_table[columns].to_numpy()
+        * 0.01
+    )
+    timing_table = pd.concat(
+        [
+            timing_table,
+            pd.DataFrame(
+                absolute_times,
+                index=timing_table.index,
+                columns=[column + " (absolute)" for column in columns],
+            ),
+        ],
+        axis=1,
     )
 
     # Try to guess a sensible name
@@ -239,20 +525,34 @@ def read_timings_from_logfile(
             name = path.parent.stem
         else:
             name = path.stem
-    timing_table.name = name
+    timing_table.attrs["name"] = name
 
-    if skip_first:
-        timing_table = timing_table.drop([0])
+    return timing_table
 
-    # Convert the following %-times to seconds
-    columns = ["Calc", "Inv", "Comm", "I/O", "SOLVER"]
 
-    for column in columns:
-        timing_table[column + " (absolute)"] = timing_table["Wall Time"] * (
-            timing_table[column] / 100
-        )
+def read_timings_array(
+    nout=None, directory="data", logfile="BOUT.log.0", skip_first=True
+):
+    """Return the timings table from logfile in directory as a numpy
+    array, along with a dict of column names to column indices
 
-    return timing_table
+    This parses the table straight into an array without building a
+    DataFrame, so is cheaper than `read_timings_from_logfile` when only
+    simple reductions are needed. It doesn't include the "(absolute)"
+    columns. The arguments are as for `read_timings_from_logfile`
+
+    """
+    header, rows = _read_timings_block(os.path.join(directory, logfile))
+
+    timings = np.loadtxt(io.StringIO(rows), ndmin=2)
+
+    if nout is not None:
+        timings = timings[:nout]
+
+    if skip_first:
+        timings = timings[1:]
+
+    return timings, {column: index for index, column in enumerate(header)}
 
 
 def total_rhs(timing_table):
@@ -273,6 +573,17 @@ def time_per_rhs(timing_table):
     return average_per_rhs(timing_table, "Wall Time")
 
 
+def inv_and_time_per_rhs(timings, columns):
+    """Return the average inversion time and wall time per rhs eval,
+    from a timings array and column indices from `read_timings_array`
+    """
+    wall_time = timings[:, columns["Wall Time"]]
+    rhs_evals = timings[:, columns["RHS evals"]].sum()
+    # Inversion time is given as a percentage of the wall time
+    inv_time = wall_time * timings[:, columns["Inv"]] * 0.01
+    return inv_time.sum() / rhs_evals, wall_time.sum() / rhs_evals
+
+
 def average_and_std_per_rhs(timing_table, column):
     """Return the average `timing_table[column]` per rhs eval, and its
     standard deviation
@@ -283,6 +594,16 @@ def average_and_std_per_rhs(timing_table, column):
     return {"mean": value_per_rhs.mean(), "std": value_per_rhs.std()}
 
 
+def all_averages_and_stds_per_rhs(timing_table, columns):
+    """Return the average of each of `timing_table[columns]` per rhs
+    eval, and their standard deviations, as a pair of Series
+
+    """
+
+    value_per_rhs = timing_table[columns].div(timing_table["RHS evals"], axis=0)
+    return value_per_rhs.mean(), value_per_rhs.std()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="git bisect script for performance regression"
@@ -291,6 +612,23 @@ def main():
     parser.add_argument(
         "--no-clean", action="store_false", dest="clean", help="Don't clean library"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only clean library if the build system has changed",
+    )
+    parser.add_argument(
+        "--no-optimise",
+        action="store_false",
+        dest="optimise",
+        help="Build library with -O0, useful when not bisecting performance",
+    )
+    parser.add_argument(
+        "--no-ccache",
+        action="store_false",
+        dest="ccache",
+        help="Don't use ccache to compile library, even if available",
+    )
     parser.add_argument(
         "--no-configure",
         action="store_false",
@@ -315,6 +653,19 @@ def main():
     parser.add_argument(
         "--script", default=None, help="Other script to run to determine good/bad"
     )
+    parser.add_argument(
+        "--artifact-url-template",
+        default=None,
+        help="URL of pre-built BOUT++ archive to use instead of building, "
+        "with '{commit}' or '{sha}' replaced by the short or full commit hash",
+    )
+    parser.add_argument(
+        "--artifact-format",
+        default=None,
+        choices=[name for name, _, _ in shutil.get_unpack_formats()],
+        help="Archive format of --artifact-url-template, if it can't be "
+        "guessed from the URL",
+    )
 
     # How to keep in sync with dict `metrics` below?
     metric_choices = ["runtime-low", "runtime-mean", "inv_per_rhs", "time_per_rhs"]
@@ -330,6 +681,33 @@ def main():
     if (args.good is None) ^ (args.bad is None):
         raise RuntimeError("You must supply either both of good and bad, or neither")
 
+    if args.artifact_url_template is not None:
+        # Check the template now: a bad template would otherwise fail on
+        # every commit, and git bisect would mark them all bad or skip
+        # them all
+        try:
+            urls = {
+                args.artifact_url_template.format(commit=sha[:7], sha=sha)
+                for sha in ("0" * 40, "1" * 40)
+            }
+        except (KeyError, IndexError, ValueError) as error:
+            parser.error(
+                "invalid --artifact-url-template {!r}: {!r}".format(
+                    args.artifact_url_template, error
+                )
+            )
+        if len(urls) != 2:
+            parser.error("--artifact-url-template must contain '{commit}' or '{sha}'")
+        if args.artifact_format is None:
+            args.artifact_format = guess_archive_format(
+                urllib.parse.urlparse(urls.pop()).path
+            )
+            if args.artifact_format is None:
+                parser.error(
+                    "can't tell archive format from --artifact-url-template, "
+                    "use --artifact-format"
+                )
+
     if args.just_run:
         args.clean = args.configure = args.make = args.write = False
 
@@ -337,15 +715,35 @@ def main():
 
     log_dir = os.path.join(args.log_dir, git["commit"])
 
+    if args.ccache:
+        # Needs to be set before configuring, so that configure's test
+        # compiles use the same cache
+        args.ccache = setup_ccache()
+
     try:
         if args.clean:
-            cleanup()
+            cleanup(incremental=args.incremental)
+
+        if args.artifact_url_template is not None:
+            fetch_bout(
+                args.artifact_url_template,
+                git["commit"],
+                git["sha"],
+                archive_format=args.artifact_format,
+            )
+        else:
+            if args.configure:
+                configure_bout(optimise=args.optimise, use_ccache=args.ccache)
 
-        if args.configure:
-            configure_bout()
+            if args.make:
+                build_bout(use_ccache=args.ccache)
 
-        if args.make:
-            build_bout()
+        # We can only stop early if we're deciding on the runtime
+        stop_early = (
+            args.good is not None
+            and args.script is None
+            and args.metric.startswith("runtime")
+        )
 
         runtime = runtest(
             args.nout,
@@ -353,6 +751,9 @@ def main():
             log_dir=log_dir,
             path=args.path,
             model=args.model,
+            good=float(args.good) if stop_early else None,
+            bad=float(args.bad) if stop_early else None,
+            metric="low" if args.metric == "runtime-low" else "mean",
         )
     except RuntimeError:
         exit(GIT_SKIP_COMMIT_EXIT_CODE)
@@ -368,8 +769,7 @@ def main():
         print(log_line)
 
         if args.write:
-            with open("bisect_script_log", "a") as f:
-                f.write(log_line)
+            append_to_log("bisect_script_log", log_line)
 
         exit(status)
 
@@ -380,37 +780,37 @@ def main():
     print(timings)
 
     if args.write:
-        with open("bisect_timings", "a") as f:
-            f.write(timings)
+        append_to_log("bisect_timings", timings)
 
     if args.good is not None:
-        invs_per_rhs = 0.0
-        times_per_rhs = 0.0
+        invs_per_rhs = [0.0]
+        times_per_rhs = [0.0]
 
         if not args.metric.startswith("runtime"):
             runs = [
                 os.path.join(log_dir, "run{:02d}".format(run))
                 for run in range(args.repeat)
             ]
-            dfs = {
-                run: read_timings_from_logfile(args.nout, directory=run) for run in runs
-            }
-
-            invs_per_rhs = [
-                average_per_rhs(df, "Inv (absolute)") for df in dfs.values()
+            # Read these serially: np.loadtxt holds the GIL, so threads
+            # wouldn't help, and each log only takes a millisecond or so
+            averages = [
+                inv_and_time_per_rhs(*read_timings_array(args.nout, directory=run))
+                for run in runs
             ]
-            times_per_rhs = [time_per_rhs(df) for df in dfs.values()]
+
+            invs_per_rhs = [inv for inv, _ in averages]
+            times_per_rhs = [wall_time for _, wall_time in averages]
 
         metrics = {
             "runtime-low": {"metric": runtime["low"], "std": runtime["std"]},
             "runtime-mean": {"metric": runtime["mean"], "std": runtime["std"]},
             "inv_per_rhs": {
-                "metric": np.min(invs_per_rhs),
-                "std": np.std(invs_per_rhs),
+                "metric": min(invs_per_rhs),
+                "std": _mean_and_std(invs_per_rhs)[1],
             },
             "time_per_rhs": {
-                "metric": np.min(times_per_rhs),
-                "std": np.std(times_per_rhs),
+                "metric": min(times_per_rhs),
+                "std": _mean_and_std(times_per_rhs)[1],
             },
         }
 
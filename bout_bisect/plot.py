@@ -39,30 +39,36 @@ def make_bar_plot(tables, legend=None, columns=None):
         ]
     column_position = np.arange(len(columns))
 
-    def get_all_timings(table, columns):
-        return {
-            column: bout_bisect.average_and_std_per_rhs(table, column)
-            for column in columns
+    # Compute the means and standard deviations for all the columns
+    # at once, as arrays of shape (tables, columns)
+    averages = [
+        bout_bisect.all_averages_and_stds_per_rhs(table, columns) for table in tables
+    ]
+    means = np.array([mean.to_numpy() for mean, _ in averages])
+    stds = np.array([std.to_numpy() for _, std in averages])
+
+    all_timings = {
+        table.attrs["name"]: {
+            column: {"mean": mean, "std": std}
+            for column, mean, std in zip(columns, table_means, table_stds)
         }
+        for table, table_means, table_stds in zip(tables, means, stds)
+    }
 
-    all_timings = {table.name: get_all_timings(table, columns) for table in tables}
     items = len(tables)
     width = (1.0 - 1.0 / (items + 1)) / items
     offsets = width * (np.arange(items) - (items - 1) / 2)
 
     fig, ax = plt.subplots()
 
-    def get_item(table, item, columns):
-        return [all_timings[table.name][column][item] for column in columns]
-
-    for table, offset in zip(tables, offsets):
+    for table, offset, mean, std in zip(tables, offsets, means, stds):
         # Plot all the columns for one table at a time
         bars = ax.bar(
             column_position + offset,
-            get_item(table, "mean", columns),
+            mean,
             width,
-            yerr=get_item(table, "std", columns),
-            label=table.name,
+            yerr=std,
+            label=table.attrs["name"],
             error_kw=dict(capsize=3),
         )
         # Attach a text label above each bar, displaying its height
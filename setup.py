@@ -10,6 +10,6 @@ setup(
     author="Peter Hill",
     license="MIT",
     packages=["bout_bisect"],
-    install_requires=["numpy >= 1.17.0", "pandas >= 0.24.2"],
+    install_requires=["numpy >= 1.17.0", "pandas >= 1.0.0"],
     entry_points={"console_scripts": ["bout_bisect = bout_bisect.bout_bisect:main"]},
 )